@@ -23,10 +23,12 @@ from .__main__ import (
 from .core import (
     EBOOK_EXTENSIONS,
     FORMAT_PRIORITY,
+    SKIP_DIRS,
     extract_book_identifier,
     filter_onefile_per_book,
     find_ebooks,
     is_ebook_file,
+    iter_ebooks,
     parse_extensions,
 )
 
@@ -37,11 +39,13 @@ __all__ = [
     "main",
     "is_ebook_file",
     "find_ebooks",
+    "iter_ebooks",
     "extract_book_identifier",
     "filter_onefile_per_book",
     "parse_extensions",
     "FORMAT_PRIORITY",
     "EBOOK_EXTENSIONS",
+    "SKIP_DIRS",
     "process_ebook_with_beets",
     "import_ebook_to_beets",
     "scan_collection",
@@ -10,13 +10,38 @@ import argparse
 import os
 import subprocess
 import sys
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
-from .core import filter_onefile_per_book, find_ebooks, is_ebook_file, parse_extensions
+from .core import (
+    filter_onefile_per_book,
+    find_ebooks,
+    is_ebook_file,
+    parse_extensions,
+)
 
 # Configuration - adjust these paths to match your setup
 BEETS_EXE = r"F:\ottsc\AppData\Roaming\Python\Python313\Scripts\beet.exe"
 
+# Keep batched beet command lines under Windows' 32767-character limit
+MAX_BATCH_ARGS_LENGTH = 30000
+
+
+def _batch_paths(paths: List[str]) -> Iterator[List[str]]:
+    """Split paths into batches that fit on a single beet command line."""
+    batch: List[str] = []
+    length = 0
+    for path in paths:
+        # Account for the separating space and possible quoting
+        path_length = len(path) + 3
+        if batch and length + path_length > MAX_BATCH_ARGS_LENGTH:
+            yield batch
+            batch = []
+            length = 0
+        batch.append(path)
+        length += path_length
+    if batch:
+        yield batch
+
 
 def process_ebook_with_beets(ebook_path: str) -> Optional[str]:
     """Process an ebook using the beets ebook command."""
@@ -163,25 +188,27 @@ def batch_import_ebooks(
         print("Import cancelled.")
         return
 
+    imported = 0
     try:
         if allowed_extensions or onefile:
-            # When filtering by extensions or using onefile, import files individually
-            imported = 0
-            for ebook in ebooks:
-                print(f"\nImporting: {os.path.basename(ebook)}")
-                abs_path = os.path.abspath(ebook)
-                result = subprocess.run(
-                    [BEETS_EXE, "import-ebooks", abs_path],
+            # When filtering by extensions or using onefile, import the selected
+            # files in as few beet invocations as the command line allows
+            abs_paths = [os.path.abspath(ebook) for ebook in ebooks]
+            for batch in _batch_paths(abs_paths):
+                print(f"\nImporting {len(batch)} ebook(s)...")
+                # Replace undecodable bytes so one odd title can't abort
+                # the rest of the import
+                batch_result = subprocess.run(
+                    [BEETS_EXE, "import-ebooks", *batch],
                     capture_output=True,
                     text=True,
+                    errors="replace",
                     check=True,
                 )
-                if result.stdout:
-                    if "Successfully imported" in result.stdout:
-                        imported += 1
-                        print("✓ Imported successfully")
-                    else:
-                        print("✗ Import failed")
+                output = batch_result.stdout
+                if output:
+                    print(output.strip())
+                imported += output.count("Successfully imported")
 
             print(
                 f"\n✅ Batch import completed: {imported}/{len(ebooks)} "
@@ -204,6 +231,12 @@ def batch_import_ebooks(
         print(f"Error importing ebooks: {e}")
         if e.stderr:
             print(f"Error details: {e.stderr}")
+        if allowed_extensions or onefile:
+            # The failed batch may still have imported some of its files
+            if e.stdout:
+                print(e.stdout.strip())
+                imported += e.stdout.count("Successfully imported")
+            print(f"Imported {imported}/{len(ebooks)} ebooks before the error")
     except FileNotFoundError:
         print(f"Beets executable not found at {BEETS_EXE}")
 
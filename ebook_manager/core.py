@@ -4,9 +4,20 @@ Core functionality for ebook management.
 Contains the fundamental functions for file detection, grouping, and filtering.
 """
 
+import functools
 import os
 import re
-from typing import List, Optional
+from collections import defaultdict
+from typing import (
+    AbstractSet,
+    DefaultDict,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 # Default ebook file extensions
 EBOOK_EXTENSIONS = [".epub", ".pdf", ".mobi", ".lrf", ".azw", ".azw3"]
@@ -21,45 +32,119 @@ FORMAT_PRIORITY = {
     ".lrf": 1,  # Lowest priority
 }
 
+# Directory names find_ebooks does not descend into by default (hidden
+# directories are skipped as well); pass skip_dirs to use a different set
+SKIP_DIRS = frozenset({"__pycache__", "node_modules"})
+
+# Trailing suffixes like "(1)" or "[2005]" stripped from titles when grouping
+_TITLE_SUFFIX_RE = re.compile(r"\s*[\(\[][^)\]]*[\)\]]\s*$")
+
 
 def is_ebook_file(
-    filename: str, allowed_extensions: Optional[List[str]] = None
+    filename: str, allowed_extensions: Optional[Sequence[str]] = None
 ) -> bool:
     """Check if a file is an ebook based on its extension."""
-    extensions = allowed_extensions or EBOOK_EXTENSIONS
-    return any(filename.lower().endswith(ext) for ext in extensions)
+    return _has_extension(filename, tuple(allowed_extensions or EBOOK_EXTENSIONS))
+
+
+def _has_extension(name: str, extensions: Tuple[str, ...]) -> bool:
+    """Check a name against a prepared tuple of lowercase extensions."""
+    # Most names already have lowercase extensions; only lower() on a miss
+    return name.endswith(extensions) or name.lower().endswith(extensions)
+
+
+def _is_skipped_dir(name: str, skip_dirs: AbstractSet[str], skip_hidden: bool) -> bool:
+    """Check if a directory should be skipped during traversal."""
+    return (skip_hidden and name.startswith(".")) or name in skip_dirs
+
+
+def _scan_ebooks(
+    directory: str,
+    extensions: Tuple[str, ...],
+    suffix_length: int,
+    skip_dirs: AbstractSet[str],
+    skip_hidden: bool,
+) -> Iterator[str]:
+    """Recursively yield ebook paths using cached os.scandir entry types."""
+    try:
+        entries = os.scandir(directory)
+    except OSError:
+        # Match os.walk, which silently skips unreadable directories
+        return
+
+    # Like os.walk(topdown=True), yield this directory's files before
+    # descending, so walk order (and onefile tie-breaking) is unchanged
+    subdirectories = []
+    with entries:
+        for entry in entries:
+            name = entry.name
+            if entry.is_dir(follow_symlinks=False):
+                if not _is_skipped_dir(name, skip_dirs, skip_hidden):
+                    subdirectories.append(entry.path)
+                continue
+
+            # Only the tail can match an extension, so avoid lowercasing the
+            # whole name. Checking the name first also skips is_file() (a
+            # stat for symlinks).
+            if _has_extension(name[-suffix_length:], extensions):
+                if entry.is_file():
+                    yield entry.path
+
+    for subdirectory in subdirectories:
+        yield from _scan_ebooks(
+            subdirectory, extensions, suffix_length, skip_dirs, skip_hidden
+        )
+
+
+def iter_ebooks(
+    directory: str,
+    allowed_extensions: Optional[List[str]] = None,
+    skip_dirs: AbstractSet[str] = SKIP_DIRS,
+    skip_hidden: bool = True,
+) -> Iterator[str]:
+    """Lazily yield ebook files, pruning skip_dirs and (optionally) hidden dirs."""
+    # Normalize once so every per-file check reuses the same tuple
+    extensions = tuple(allowed_extensions or EBOOK_EXTENSIONS)
+    suffix_length = max(len(ext) for ext in extensions)
+    return _scan_ebooks(directory, extensions, suffix_length, skip_dirs, skip_hidden)
 
 
 def find_ebooks(
-    directory: str, allowed_extensions: Optional[List[str]] = None
+    directory: str,
+    allowed_extensions: Optional[List[str]] = None,
+    skip_dirs: AbstractSet[str] = SKIP_DIRS,
+    skip_hidden: bool = True,
 ) -> List[str]:
     """Find all ebook files in a directory."""
-    ebooks = []
-    for root, _, files in os.walk(directory):
-        for file in files:
-            if is_ebook_file(file, allowed_extensions):
-                ebooks.append(os.path.join(root, file))
-    return ebooks
+    return list(iter_ebooks(directory, allowed_extensions, skip_dirs, skip_hidden))
 
 
 def extract_book_identifier(filepath: str) -> str:
     """Extract a simple book identifier from filename for grouping."""
-    filename = os.path.basename(filepath)
-    # Remove extension
-    name_without_ext = os.path.splitext(filename)[0]
+    return _book_id_from_name(os.path.basename(filepath))
+
+
+@functools.lru_cache(maxsize=65536)
+def _book_id_from_name(filename: str) -> str:
+    """Build the grouping identifier for a bare filename (memoized)."""
+    # Remove extension and lowercase once for both branches below
+    name_without_ext = os.path.splitext(filename)[0].lower()
 
     # Simple approach: try to extract "Author - Title" pattern
-    if " - " in name_without_ext:
-        parts = name_without_ext.split(" - ", 1)
-        if len(parts) == 2:
-            author = parts[0].strip()
-            title = parts[1].strip()
-            # Remove common suffixes like "(1)", "[2005]", etc.
-            title = re.sub(r"\s*[\(\[][^)\]]*[\)\]]\s*$", "", title)
-            return f"{author} - {title}".lower()
+    author, separator, title = name_without_ext.partition(" - ")
+    if separator:
+        # Remove common suffixes like "(1)", "[2005]", etc.
+        title = _TITLE_SUFFIX_RE.sub("", title.strip())
+        return f"{author.strip()} - {title}"
 
     # Fallback: use the base filename without extension
-    return name_without_ext.lower()
+    return name_without_ext
+
+
+def _format_priority(filepath: str) -> int:
+    """Look up the --onefile priority of a file from its extension."""
+    # splitext ignores leading dots, so a hidden file named ".epub" gets 0
+    return FORMAT_PRIORITY.get(os.path.splitext(filepath)[1].lower(), 0)
 
 
 def filter_onefile_per_book(ebooks: List[str]) -> List[str]:
@@ -67,36 +152,32 @@ def filter_onefile_per_book(ebooks: List[str]) -> List[str]:
     if not ebooks:
         return ebooks
 
-    # Group ebooks by book identifier
-    book_groups: dict[str, List[str]] = {}
+    # Single pass: keep the best (priority, position, path) seen for each
+    # book, plus every file in discovery order for the log below
+    best_files: Dict[str, Tuple[int, int, str]] = {}
+    book_files: DefaultDict[str, List[str]] = defaultdict(list)
     for ebook_path in ebooks:
         book_id = extract_book_identifier(ebook_path)
-        if book_id not in book_groups:
-            book_groups[book_id] = []
-        book_groups[book_id].append(ebook_path)
-
-    # Select best format for each book
-    filtered_ebooks = []
-    for book_id, book_files in book_groups.items():
-        if len(book_files) == 1:
-            # Only one file for this book
-            filtered_ebooks.append(book_files[0])
-        else:
-            # Multiple files - select the highest priority format
-            best_file = max(
-                book_files,
-                key=lambda f: FORMAT_PRIORITY.get(os.path.splitext(f)[1].lower(), 0),
+        priority = _format_priority(ebook_path)
+        files = book_files[book_id]
+        current = best_files.get(book_id)
+        if current is None or priority > current[0]:
+            best_files[book_id] = (priority, len(files), ebook_path)
+        files.append(ebook_path)
+
+    # Log what we're skipping, one write per book; the best file's position
+    # splits the rest out without comparing every path against it
+    for book_id, (_, best_index, best_file) in best_files.items():
+        files = book_files[book_id]
+        if len(files) > 1:
+            lines = [f"Book: {book_id}", f"  Selected: {os.path.basename(best_file)}"]
+            lines.extend(
+                f"  Skipped:  {os.path.basename(skipped_file)}"
+                for skipped_file in files[:best_index] + files[best_index + 1 :]
             )
-            filtered_ebooks.append(best_file)
-
-            # Log what we're skipping
-            skipped = [f for f in book_files if f != best_file]
-            print(f"Book: {book_id}")
-            print(f"  Selected: {os.path.basename(best_file)}")
-            for skipped_file in skipped:
-                print(f"  Skipped:  {os.path.basename(skipped_file)}")
+            print("\n".join(lines))
 
-    return filtered_ebooks
+    return [best_file for _, _, best_file in best_files.values()]
 
 
 def parse_extensions(ext_arg: Optional[str]) -> Optional[List[str]]:
@@ -1,7 +1,11 @@
+import argparse
 import os
+import shutil
 import subprocess
 import tempfile
+import types
 import unittest
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 # Import the ebook_manager package
@@ -22,6 +26,7 @@ from ebook_manager.core import (
     filter_onefile_per_book,
     find_ebooks,
     is_ebook_file,
+    iter_ebooks,
     parse_extensions,
 )
 
@@ -29,10 +34,10 @@ from ebook_manager.core import (
 class TestEbookManager(unittest.TestCase):
     """Test cases for the ebook_manager.py functionality."""
 
-    def setUp(self):
-        """Set up test fixtures."""
-        self.test_dir = tempfile.mkdtemp()
-        self.test_files = []
+    @classmethod
+    def setUpClass(cls):
+        """Set up test fixtures shared by all tests (read-only)."""
+        cls.test_dir = tempfile.mkdtemp()
 
         # Create test ebook files with various extensions
         test_books = [
@@ -46,18 +51,14 @@ class TestEbookManager(unittest.TestCase):
             "Arthur C. Clarke - 2001.mp3",  # Not an ebook
         ]
 
+        # Only names and extensions matter, so empty files are enough
         for book in test_books:
-            file_path = os.path.join(self.test_dir, book)
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(f"Test content for {book}")
-            self.test_files.append(file_path)
+            Path(os.path.join(cls.test_dir, book)).touch()
 
-    def tearDown(self):
+    @classmethod
+    def tearDownClass(cls):
         """Clean up test fixtures."""
-        for file_path in self.test_files:
-            if os.path.exists(file_path):
-                os.unlink(file_path)
-        os.rmdir(self.test_dir)
+        shutil.rmtree(cls.test_dir, ignore_errors=True)
 
     def test_is_ebook_file_basic(self):
         """Test basic ebook file detection."""
@@ -144,6 +145,98 @@ class TestEbookManager(unittest.TestCase):
         no_files = find_ebooks(self.test_dir, [".xyz"])
         self.assertEqual(len(no_files), 0)
 
+    def test_iter_ebooks_is_lazy(self):
+        """Test that iter_ebooks doesn't touch the filesystem until iterated."""
+        with patch("os.scandir", wraps=os.scandir) as mock_scandir:
+            ebook_iter = iter_ebooks(self.test_dir, [".epub"])
+
+            self.assertIsInstance(ebook_iter, types.GeneratorType)
+            mock_scandir.assert_not_called()
+
+            first = next(ebook_iter)
+            mock_scandir.assert_called_once_with(self.test_dir)
+
+        self.assertTrue(first.endswith(".epub"))
+
+    def test_find_ebooks_skips_hidden_and_ignored_directories(self):
+        """Test that hidden and ignored directories are not traversed."""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            for subdir in ["Author", ".git", "__pycache__", "node_modules"]:
+                os.makedirs(os.path.join(temp_dir, subdir))
+                Path(os.path.join(temp_dir, subdir, "book.epub")).touch()
+
+            ebooks = find_ebooks(temp_dir)
+
+            self.assertEqual(ebooks, [os.path.join(temp_dir, "Author", "book.epub")])
+
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_find_ebooks_skip_dirs_can_be_overridden(self):
+        """Test that callers can choose which directories are pruned."""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            for subdir in ["Author", ".git", "node_modules"]:
+                os.makedirs(os.path.join(temp_dir, subdir))
+                Path(os.path.join(temp_dir, subdir, "book.epub")).touch()
+
+            ebooks = find_ebooks(temp_dir, skip_dirs={"Author"})
+            self.assertEqual(
+                ebooks, [os.path.join(temp_dir, "node_modules", "book.epub")]
+            )
+
+            ebooks = find_ebooks(temp_dir, skip_dirs=set(), skip_hidden=False)
+            self.assertEqual(len(ebooks), 3)
+
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_find_ebooks_lists_files_before_subdirectories(self):
+        """Test that each directory's files come before its subdirectories'."""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            os.makedirs(os.path.join(temp_dir, "a", "deep"))
+            Path(os.path.join(temp_dir, "z.epub")).touch()
+            Path(os.path.join(temp_dir, "a", "m.epub")).touch()
+            Path(os.path.join(temp_dir, "a", "deep", "b.epub")).touch()
+
+            ebooks = find_ebooks(temp_dir)
+
+            self.assertEqual(
+                ebooks,
+                [
+                    os.path.join(temp_dir, "z.epub"),
+                    os.path.join(temp_dir, "a", "m.epub"),
+                    os.path.join(temp_dir, "a", "deep", "b.epub"),
+                ],
+            )
+
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_find_ebooks_scans_hidden_root_directory(self):
+        """Test that a hidden directory passed as the root is still scanned."""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            hidden_root = os.path.join(temp_dir, ".library")
+            os.makedirs(os.path.join(hidden_root, "Author"))
+            Path(os.path.join(hidden_root, "book.epub")).touch()
+            Path(os.path.join(hidden_root, "Author", "other.pdf")).touch()
+
+            ebooks = find_ebooks(hidden_root)
+
+            self.assertEqual(
+                sorted(ebooks),
+                [
+                    os.path.join(hidden_root, "Author", "other.pdf"),
+                    os.path.join(hidden_root, "book.epub"),
+                ],
+            )
+
+        finally:
+            shutil.rmtree(temp_dir)
+
     def test_parse_extensions(self):
         """Test extension parsing functionality."""
         # Test None input
@@ -273,27 +366,93 @@ class TestEbookManager(unittest.TestCase):
     @patch("builtins.input")
     @patch("subprocess.run")
     def test_batch_import_with_filtering(self, mock_run, mock_input, mock_find):
-        """Test batch import with extension filtering uses individual imports."""
+        """Test batch import with extension filtering imports files in one call."""
         # Mock user input and found files
         mock_input.return_value = "y"
         mock_find.return_value = ["book1.epub", "book2.epub"]
 
         # Mock successful subprocess run
         mock_result = MagicMock()
-        mock_result.stdout = "Successfully imported ebook"
+        mock_result.stdout = (
+            "Successfully imported book1.epub\nSuccessfully imported book2.epub"
+        )
         mock_run.return_value = mock_result
 
-        with patch("builtins.print"):
+        with patch("builtins.print") as mock_print:
             batch_import_ebooks(self.test_dir, [".epub"])
 
-        # When filtering, should use individual imports (2 calls)
-        self.assertEqual(mock_run.call_count, 2)
+        # When filtering, all selected files go to a single beet call
+        self.assertEqual(mock_run.call_count, 1)
+
+        args = mock_run.call_args[0][0]
+        self.assertEqual(args[1], "import-ebooks")
+        self.assertEqual(
+            args[2:], [os.path.abspath("book1.epub"), os.path.abspath("book2.epub")]
+        )
+        # Output is decoded like every other beet call
+        self.assertTrue(mock_run.call_args.kwargs["text"])
+        self.assertEqual(mock_run.call_args.kwargs["errors"], "replace")
 
-        # Check that each call uses import-ebooks with individual files
-        for call_obj in mock_run.call_args_list:
-            args = call_obj[0][0]  # Get the command arguments
-            self.assertEqual(args[1], "import-ebooks")
-            self.assertTrue(args[2].endswith(".epub"))
+        print_calls = [call_obj.args[0] for call_obj in mock_print.call_args_list]
+        self.assertIn(mock_result.stdout, print_calls)
+        self.assertTrue(any("2/2 ebooks imported" in text for text in print_calls))
+
+    @patch("ebook_manager.__main__.find_ebooks")
+    @patch("builtins.input")
+    @patch("subprocess.run")
+    def test_batch_import_with_filtering_splits_long_command_lines(
+        self, mock_run, mock_input, mock_find
+    ):
+        """Test batch import splits files across calls to fit the command line."""
+        mock_input.return_value = "y"
+        mock_find.return_value = [f"book{i}.epub" for i in range(5)]
+
+        mock_result = MagicMock()
+        mock_result.stdout = "Successfully imported"
+        mock_run.return_value = mock_result
+
+        with patch("ebook_manager.__main__.MAX_BATCH_ARGS_LENGTH", 1):
+            with patch("builtins.print"):
+                batch_import_ebooks(self.test_dir, [".epub"])
+
+        # Each batch always holds at least one file
+        self.assertEqual(mock_run.call_count, 5)
+        imported_paths = [call_obj[0][0][2] for call_obj in mock_run.call_args_list]
+        self.assertEqual(
+            imported_paths, [os.path.abspath(f"book{i}.epub") for i in range(5)]
+        )
+
+    @patch("ebook_manager.__main__.find_ebooks")
+    @patch("builtins.input")
+    @patch("subprocess.run")
+    def test_batch_import_with_filtering_reports_progress_on_error(
+        self, mock_run, mock_input, mock_find
+    ):
+        """Test a failing batch reports its output and the ebooks imported so far."""
+        mock_input.return_value = "y"
+        mock_find.return_value = ["book1.epub", "book2.epub"]
+
+        mock_result = MagicMock()
+        mock_result.stdout = "Successfully imported book1.epub"
+        mock_run.side_effect = [
+            mock_result,
+            subprocess.CalledProcessError(
+                1,
+                "beet",
+                output="Successfully imported book2.epub",
+                stderr="Import failed",
+            ),
+        ]
+
+        with patch("ebook_manager.__main__.MAX_BATCH_ARGS_LENGTH", 1):
+            with patch("builtins.print") as mock_print:
+                batch_import_ebooks(self.test_dir, [".epub"])
+
+        print_calls = [call_obj.args[0] for call_obj in mock_print.call_args_list]
+        self.assertIn("Successfully imported book1.epub", print_calls)
+        self.assertIn("Error details: Import failed", print_calls)
+        self.assertIn("Successfully imported book2.epub", print_calls)
+        self.assertIn("Imported 2/2 ebooks before the error", print_calls)
 
     @patch("ebook_manager.__main__.find_ebooks")
     @patch("builtins.input")
@@ -445,20 +604,73 @@ class TestEbookManager(unittest.TestCase):
             if os.path.exists(temp_dir):
                 os.rmdir(temp_dir)
 
+    def test_filter_onefile_per_book_keeps_first_seen_order(self):
+        """Test that filtering keeps book order when a better format comes later."""
+        ebooks = [
+            "Isaac Asimov - Foundation.pdf",
+            "Frank Herbert - Dune.mobi",
+            "Isaac Asimov - Foundation.epub",
+            "Frank Herbert - Dune.lrf",
+        ]
+
+        with patch("builtins.print") as mock_print:
+            filtered = filter_onefile_per_book(ebooks)
+
+        self.assertEqual(
+            filtered, ["Isaac Asimov - Foundation.epub", "Frank Herbert - Dune.mobi"]
+        )
+
+        # One log entry per book with skipped formats
+        self.assertEqual(mock_print.call_count, 2)
+        self.assertEqual(
+            mock_print.call_args_list[0].args[0],
+            "Book: isaac asimov - foundation\n"
+            "  Selected: Isaac Asimov - Foundation.epub\n"
+            "  Skipped:  Isaac Asimov - Foundation.pdf",
+        )
+
+    def test_filter_onefile_per_book_logs_skipped_in_discovery_order(self):
+        """Test that skipped files are logged in the order they were found."""
+        ebooks = ["C.azw3", "c.pdf", "c", "C.azw"]
+
+        with patch("builtins.print") as mock_print:
+            filtered = filter_onefile_per_book(ebooks)
+
+        self.assertEqual(filtered, ["C.azw"])
+        mock_print.assert_called_once_with(
+            "Book: c\n"
+            "  Selected: C.azw\n"
+            "  Skipped:  C.azw3\n"
+            "  Skipped:  c.pdf\n"
+            "  Skipped:  c"
+        )
+
+    def test_filter_onefile_per_book_ignores_hidden_file_extension(self):
+        """Test that a hidden file named like an extension has no priority."""
+        ebooks = [".epub", ".epub.pdf"]
+
+        with patch("builtins.print"):
+            filtered = filter_onefile_per_book(ebooks)
+
+        self.assertEqual(filtered, [".epub.pdf"])
+
     def test_format_priority(self):
         """Test that format priority is applied correctly."""
         formats_by_priority = [".epub", ".mobi", ".azw", ".azw3", ".pdf", ".lrf"]
 
-        for i, format1 in enumerate(formats_by_priority):
-            for j, format2 in enumerate(formats_by_priority):
-                if i < j:  # format1 should have higher priority than format2
-                    priority1 = FORMAT_PRIORITY.get(format1, 0)
-                    priority2 = FORMAT_PRIORITY.get(format2, 0)
-                    self.assertGreater(
-                        priority1,
-                        priority2,
-                        f"{format1} should have higher priority than {format2}",
-                    )
+        # Every format has a distinct priority, so there are no ties to break
+        self.assertEqual(set(FORMAT_PRIORITY), set(formats_by_priority))
+        self.assertEqual(
+            len(set(FORMAT_PRIORITY.values())),
+            len(FORMAT_PRIORITY),
+            "Format priorities must be unique",
+        )
+
+        # Sorting by priority reproduces the documented order
+        self.assertEqual(
+            sorted(formats_by_priority, key=FORMAT_PRIORITY.get, reverse=True),
+            formats_by_priority,
+        )
 
 
 class TestEbookManagerCLI(unittest.TestCase):
@@ -470,14 +682,11 @@ class TestEbookManagerCLI(unittest.TestCase):
 
         # Create a test ebook file
         self.test_file = os.path.join(self.test_dir, "test.epub")
-        with open(self.test_file, "w") as f:
-            f.write("Test epub content")
+        Path(self.test_file).touch()
 
     def tearDown(self):
         """Clean up test fixtures."""
-        if os.path.exists(self.test_file):
-            os.unlink(self.test_file)
-        os.rmdir(self.test_dir)
+        shutil.rmtree(self.test_dir, ignore_errors=True)
 
     @patch("sys.argv")
     @patch("builtins.print")
@@ -500,11 +709,12 @@ class TestEbookManagerCLI(unittest.TestCase):
     def test_main_scan_command(self, mock_scan, mock_parse_args):
         """Test main function with scan command."""
         # Mock command line arguments
-        mock_args = MagicMock()
-        mock_args.command = "scan"
-        mock_args.path = self.test_dir
-        mock_args.ext = ".epub"
-        mock_args.onefile = False
+        mock_args = argparse.Namespace(
+            command="scan",
+            path=self.test_dir,
+            ext=".epub",
+            onefile=False,
+        )
         mock_parse_args.return_value = mock_args
 
         with patch("os.path.isdir", return_value=True):
@@ -520,11 +730,12 @@ class TestEbookManagerCLI(unittest.TestCase):
     ):
         """Test main function with import command and multiple extensions."""
         # Mock command line arguments
-        mock_args = MagicMock()
-        mock_args.command = "import"
-        mock_args.path = self.test_dir
-        mock_args.ext = ".epub,.pdf,.mobi"
-        mock_args.onefile = False
+        mock_args = argparse.Namespace(
+            command="import",
+            path=self.test_dir,
+            ext=".epub,.pdf,.mobi",
+            onefile=False,
+        )
         mock_parse_args.return_value = mock_args
 
         with patch("os.path.isdir", return_value=True):
@@ -540,10 +751,11 @@ class TestEbookManagerCLI(unittest.TestCase):
     def test_main_invalid_directory(self, mock_print, mock_parse_args):
         """Test main function with invalid directory path."""
         # Mock command line arguments
-        mock_args = MagicMock()
-        mock_args.command = "scan"
-        mock_args.path = "/nonexistent/directory"
-        mock_args.ext = None
+        mock_args = argparse.Namespace(
+            command="scan",
+            path="/nonexistent/directory",
+            ext=None,
+        )
         mock_parse_args.return_value = mock_args
 
         ebook_manager.main()
@@ -559,11 +771,12 @@ class TestEbookManagerCLI(unittest.TestCase):
     def test_main_scan_command_with_onefile(self, mock_scan, mock_parse_args):
         """Test main function with scan command and --onefile option."""
         # Mock command line arguments
-        mock_args = MagicMock()
-        mock_args.command = "scan"
-        mock_args.path = self.test_dir
-        mock_args.ext = ".epub,.pdf"
-        mock_args.onefile = True
+        mock_args = argparse.Namespace(
+            command="scan",
+            path=self.test_dir,
+            ext=".epub,.pdf",
+            onefile=True,
+        )
         mock_parse_args.return_value = mock_args
 
         with patch("os.path.isdir", return_value=True):
@@ -577,11 +790,12 @@ class TestEbookManagerCLI(unittest.TestCase):
     def test_main_import_command_with_onefile(self, mock_import, mock_parse_args):
         """Test main function with import command and --onefile option."""
         # Mock command line arguments
-        mock_args = MagicMock()
-        mock_args.command = "import"
-        mock_args.path = self.test_dir
-        mock_args.ext = None
-        mock_args.onefile = True
+        mock_args = argparse.Namespace(
+            command="import",
+            path=self.test_dir,
+            ext=None,
+            onefile=True,
+        )
         mock_parse_args.return_value = mock_args
 
         with patch("os.path.isdir", return_value=True):
@@ -597,11 +811,12 @@ class TestEbookManagerCLI(unittest.TestCase):
     ):
         """Test main function with batch-import command using --onefile and --ext."""
         # Mock command line arguments
-        mock_args = MagicMock()
-        mock_args.command = "batch-import"
-        mock_args.path = self.test_dir
-        mock_args.ext = ".epub"
-        mock_args.onefile = True
+        mock_args = argparse.Namespace(
+            command="batch-import",
+            path=self.test_dir,
+            ext=".epub",
+            onefile=True,
+        )
         mock_parse_args.return_value = mock_args
 
         with patch("os.path.isdir", return_value=True):